@@ -1,17 +1,26 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from pymongo import WriteConcern
+from pymongo.errors import DuplicateKeyError
+import jwt
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+import asyncio
 import os
+import time
 import logging
 from pathlib import Path
+from urllib.parse import unquote
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 import uuid
+import base64
+import hashlib
+import orjson
 import bcrypt
 from bson import ObjectId
 
@@ -20,20 +29,55 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    maxPoolSize=200,
+    minPoolSize=10,
+    serverSelectionTimeoutMS=2000,
+    compressors="zstd,zlib",
+    retryWrites=True,
+)
 db = client[os.environ['DB_NAME']]
+# Cart writes are cheap to redo, so they only wait for the primary's ack
+carts_collection = db.get_collection("carts", write_concern=WriteConcern(w=1))
 
 # Security
 SECRET_KEY = "tech_haven_secret_key_2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+BCRYPT_ROUNDS = 10
+# bcrypt runs in worker threads; cap how many hashes run at once
+_hash_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Token cache: raw token -> (User or None, expiry timestamp).
+# A None user marks a token that recently failed validation.
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_SWEEP_SECONDS = 60
+INVALID_TOKEN_CACHE_SECONDS = 5
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Categories cache: (response, expiry), dropped when products change
+CATEGORIES_CACHE_SECONDS = 60
+_categories_cache: Optional[tuple] = None
+_categories_lock = asyncio.Lock()
+
+# Catalog version, bumped on every product write and folded into product
+# ETags. It is per process, so the salt keeps workers from sharing ETags and
+# ETags also roll over every CATALOG_ETAG_SECONDS to pick up other workers' writes.
+CATALOG_ETAG_SECONDS = 60
+_catalog_version = 0
+CATALOG_ETAG_SALT = uuid.uuid4().hex
+
 app = FastAPI(title="Tech Haven API")
 api_router = APIRouter(prefix="/api")
 
+def generate_id() -> str:
+    # UUID4 entropy in 22 URL-safe characters instead of 36
+    return base64.urlsafe_b64encode(uuid.uuid4().bytes).rstrip(b"=").decode()
+
 # Models
 class UserCreate(BaseModel):
     email: EmailStr
@@ -42,12 +86,12 @@ class UserCreate(BaseModel):
     phone: Optional[str] = None
 
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=generate_id)
     email: EmailStr
     full_name: str
     phone: Optional[str] = None
     is_admin: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -58,7 +102,7 @@ class Token(BaseModel):
     token_type: str
 
 class Product(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=generate_id)
     name: str
     brand: str
     category: str
@@ -70,7 +114,7 @@ class Product(BaseModel):
     stock: int = 0
     rating: float = 0.0
     review_count: int = 0
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     featured: bool = False
 
 class ProductCreate(BaseModel):
@@ -90,10 +134,10 @@ class CartItem(BaseModel):
     quantity: int
 
 class Cart(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=generate_id)
     user_id: str
     items: List[CartItem] = []
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class OrderItem(BaseModel):
     product_id: str
@@ -102,91 +146,143 @@ class OrderItem(BaseModel):
     quantity: int
 
 class Order(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=generate_id)
     user_id: str
     items: List[OrderItem]
     total_amount: float
     status: str = "pending"  # pending, processing, shipped, delivered, cancelled
     shipping_address: Dict[str, Any]
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class OrderCreate(BaseModel):
     shipping_address: Dict[str, Any]
 
 class Review(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=generate_id)
     product_id: str
     user_id: str
     user_name: str
     rating: int
     comment: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class ReviewCreate(BaseModel):
     product_id: str
     rating: int
     comment: str
 
+class BatchItem(BaseModel):
+    method: str = "GET"
+    url: str
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
 # Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def encode_password(password):
+    # bcrypt only uses the first 72 bytes; newer releases raise instead of truncating
+    return password.encode()[:72]
+
+async def verify_password(plain_password, hashed_password):
+    async with _hash_semaphore:
+        return await asyncio.to_thread(
+            bcrypt.checkpw, encode_password(plain_password), hashed_password.encode()
+        )
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    async with _hash_semaphore:
+        hashed = await asyncio.to_thread(bcrypt.hashpw, encode_password(password), salt)
+    return hashed.decode()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = now + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def cache_token(token: str, user: Optional[User], expiry: float):
+    if token in _token_cache:
+        _token_cache.move_to_end(token)
+    elif len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+        _token_cache.popitem(last=False)
+    _token_cache[token] = (user, expiry)
+
+async def sweep_token_cache():
+    while True:
+        await asyncio.sleep(TOKEN_CACHE_SWEEP_SECONDS)
+        now = time.time()
+        expired = [token for token, (_, expiry) in _token_cache.items() if expiry <= now]
+        for token in expired:
+            del _token_cache[token]
+
+# Raised as a shared instance; with_traceback(None) stops tracebacks piling up on it
+CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    token = credentials.credentials
+    cached = _token_cache.get(token)
+    if cached is not None and cached[1] > time.time():
+        _token_cache.move_to_end(token)
+        if cached[0] is None:
+            raise CREDENTIALS_EXCEPTION.with_traceback(None)
+        return cached[0]
+
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    except jwt.PyJWTError:
+        email = None
     
-    user = await db.users.find_one({"email": email})
+    user = await db.users.find_one({"email": email}) if email is not None else None
     if user is None:
-        raise credentials_exception
-    return User(**user)
+        cache_token(token, None, time.time() + INVALID_TOKEN_CACHE_SECONDS)
+        raise CREDENTIALS_EXCEPTION.with_traceback(None)
+
+    # Cached users are served until the token expires, so profile changes
+    # take effect on the next login.
+    user_obj = User(**user)
+    cache_token(token, user_obj, payload["exp"])
+    return user_obj
+
+CURRENT_USER = Depends(get_current_user)
 
 # Auth endpoints
 @api_router.post("/register", response_model=dict)
 async def register(user: UserCreate):
-    # Check if user exists
-    existing_user = await db.users.find_one({"email": user.email})
+    # Check if user exists before spending a bcrypt hash on the password
+    existing_user = await db.users.find_one({"email": user.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await get_password_hash(user.password)
     
     # Create user
-    hashed_password = get_password_hash(user.password)
-    user_dict = user.dict()
+    user_dict = user.model_dump()
     del user_dict["password"]
     user_obj = User(**user_dict)
-    user_data = user_obj.dict()
+    user_data = user_obj.model_dump()
     user_data["hashed_password"] = hashed_password
     
-    await db.users.insert_one(user_data)
+    try:
+        await db.users.insert_one(user_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User registered successfully"}
 
 @api_router.post("/login", response_model=Token)
 async def login(user_login: UserLogin):
     user = await db.users.find_one({"email": user_login.email})
-    if not user or not verify_password(user_login.password, user["hashed_password"]):
+    if not user or not await verify_password(user_login.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -200,20 +296,60 @@ async def login(user_login: UserLogin):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @api_router.get("/me", response_model=User)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = CURRENT_USER):
     return current_user
 
 # Products endpoints
-@api_router.get("/products", response_model=List[Product])
+def invalidate_catalog():
+    global _catalog_version, _categories_cache
+    _catalog_version += 1
+    _categories_cache = None
+
+def catalog_etag(request: Request) -> str:
+    query = sorted(request.query_params.multi_items())
+    epoch = int(time.time() // CATALOG_ETAG_SECONDS)
+    key = f"{CATALOG_ETAG_SALT}:{_catalog_version}:{epoch}:{request.url.path}:{query}"
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # Only explicit tags count; "*" would answer 304 without knowing the resource exists
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+# Listing pages only render product cards, so list responses leave out the
+# description, specifications and all but the first image.
+PRODUCT_CARD_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "brand": 1,
+    "category": 1,
+    "price": 1,
+    "original_price": 1,
+    "rating": 1,
+    "review_count": 1,
+    "featured": 1,
+    "images": {"$slice": ["$images", 1]},
+}
+
+@api_router.api_route("/products", methods=["GET", "HEAD"], response_class=ORJSONResponse)
 async def get_products(
+    request: Request,
     category: Optional[str] = None,
     brand: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     search: Optional[str] = None,
     featured: Optional[bool] = None,
-    limit: int = 50
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100)
 ):
+    etag = catalog_etag(request)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
     query = {}
     if category:
         query["category"] = category
@@ -226,118 +362,155 @@ async def get_products(
         if max_price is not None:
             query["price"]["$lte"] = max_price
     if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}},
-            {"brand": {"$regex": search, "$options": "i"}}
-        ]
+        query["$text"] = {"$search": search}
     if featured is not None:
         query["featured"] = featured
 
-    products = await db.products.find(query).limit(limit).to_list(limit)
-    return [Product(**product) for product in products]
-
-@api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id})
+    # Documents are written through the Product model, so they are returned
+    # as stored rather than being validated again on the way out.
+    # id breaks ties (seeded products share a created_at) so pages don't overlap
+    sort = {"score": {"$meta": "textScore"}} if search else {"created_at": -1}
+    sort["id"] = 1
+    result = await db.products.aggregate([
+        {"$match": query},
+        {"$sort": sort},
+        {"$facet": {
+            "items": [{"$skip": skip}, {"$limit": limit}, {"$project": PRODUCT_CARD_PROJECTION}],
+            "total": [{"$count": "count"}]
+        }}
+    ]).to_list(1)
+    total = result[0]["total"][0]["count"] if result[0]["total"] else 0
+    return ORJSONResponse(result[0]["items"], headers={"X-Total-Count": str(total), "ETag": etag})
+
+@api_router.api_route("/products/{product_id}", methods=["GET", "HEAD"], response_class=ORJSONResponse)
+async def get_product(product_id: str, request: Request):
+    product = await db.products.find_one({"id": product_id}, {"_id": 0})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**product)
+
+    etag = catalog_etag(request)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse(product, headers={"ETag": etag})
 
 @api_router.post("/products", response_model=Product)
-async def create_product(product: ProductCreate, current_user: User = Depends(get_current_user)):
+async def create_product(product: ProductCreate, current_user: User = CURRENT_USER):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    product_obj = Product(**product.dict())
-    await db.products.insert_one(product_obj.dict())
+    product_obj = Product(**product.model_dump())
+    await db.products.insert_one(product_obj.model_dump())
+    invalidate_catalog()
     return product_obj
 
 @api_router.get("/categories")
 async def get_categories():
-    categories = await db.products.distinct("category")
-    brands = await db.products.distinct("brand")
-    return {"categories": categories, "brands": brands}
+    global _categories_cache
+    cached = _categories_cache
+    if cached is None or cached[1] <= time.monotonic():
+        async with _categories_lock:
+            # Another request may have refreshed the cache while we waited
+            cached = _categories_cache
+            if cached is None or cached[1] <= time.monotonic():
+                version = _catalog_version
+                categories = await db.products.distinct("category")
+                brands = await db.products.distinct("brand")
+                cached = ({"categories": categories, "brands": brands}, time.monotonic() + CATEGORIES_CACHE_SECONDS)
+                # A product write during the reads may have made them stale
+                if version == _catalog_version:
+                    _categories_cache = cached
+    return cached[0]
 
 # Cart endpoints
 @api_router.get("/cart", response_model=Cart)
-async def get_cart(current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
+async def get_cart(current_user: User = CURRENT_USER):
+    cart = await carts_collection.find_one({"user_id": current_user.id})
     if not cart:
         cart = Cart(user_id=current_user.id)
-        await db.carts.insert_one(cart.dict())
+        await carts_collection.insert_one(cart.model_dump())
     else:
         cart = Cart(**cart)
     return cart
 
 @api_router.post("/cart/add")
-async def add_to_cart(item: CartItem, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        cart.items = [item]
-    else:
-        cart = Cart(**cart)
-        # Check if item exists
-        existing_item = None
-        for i, cart_item in enumerate(cart.items):
-            if cart_item.product_id == item.product_id:
-                existing_item = i
-                break
-        
-        if existing_item is not None:
-            cart.items[existing_item].quantity += item.quantity
-        else:
-            cart.items.append(item)
-    
-    cart.updated_at = datetime.utcnow()
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict(), upsert=True)
+async def add_to_cart(item: CartItem, current_user: User = CURRENT_USER):
+    now = datetime.now(timezone.utc)
+    while True:
+        # Bump the quantity if the item is already in the cart
+        result = await carts_collection.update_one(
+            {"user_id": current_user.id, "items.product_id": item.product_id},
+            {"$inc": {"items.$.quantity": item.quantity}, "$set": {"updated_at": now}}
+        )
+        if result.matched_count:
+            break
+        try:
+            await carts_collection.update_one(
+                {"user_id": current_user.id, "items.product_id": {"$ne": item.product_id}},
+                {
+                    "$push": {"items": item.model_dump()},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"id": generate_id()}
+                },
+                upsert=True
+            )
+            break
+        except DuplicateKeyError:
+            # A concurrent request created the cart or added this item first
+            continue
     return {"message": "Item added to cart"}
 
 @api_router.put("/cart/update")
-async def update_cart_item(item: CartItem, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
+async def update_cart_item(item: CartItem, current_user: User = CURRENT_USER):
+    now = datetime.now(timezone.utc)
+    if item.quantity <= 0:
+        result = await carts_collection.update_one(
+            {"user_id": current_user.id},
+            {"$pull": {"items": {"product_id": item.product_id}}, "$set": {"updated_at": now}}
+        )
+    else:
+        result = await carts_collection.update_one(
+            {"user_id": current_user.id, "items.product_id": item.product_id},
+            {"$set": {"items.$.quantity": item.quantity, "updated_at": now}}
+        )
+        if not result.matched_count:
+            # Item not in cart; only touch the cart so a missing cart still 404s
+            result = await carts_collection.update_one(
+                {"user_id": current_user.id}, {"$set": {"updated_at": now}}
+            )
+    if not result.matched_count:
         raise HTTPException(status_code=404, detail="Cart not found")
-    
-    cart = Cart(**cart)
-    for i, cart_item in enumerate(cart.items):
-        if cart_item.product_id == item.product_id:
-            if item.quantity <= 0:
-                cart.items.pop(i)
-            else:
-                cart.items[i].quantity = item.quantity
-            break
-    
-    cart.updated_at = datetime.utcnow()
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict())
     return {"message": "Cart updated"}
 
 @api_router.delete("/cart/remove/{product_id}")
-async def remove_from_cart(product_id: str, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
+async def remove_from_cart(product_id: str, current_user: User = CURRENT_USER):
+    result = await carts_collection.update_one(
+        {"user_id": current_user.id},
+        {"$pull": {"items": {"product_id": product_id}}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    if not result.matched_count:
         raise HTTPException(status_code=404, detail="Cart not found")
-    
-    cart = Cart(**cart)
-    cart.items = [item for item in cart.items if item.product_id != product_id]
-    cart.updated_at = datetime.utcnow()
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict())
     return {"message": "Item removed from cart"}
 
 # Orders endpoints
 @api_router.post("/orders", response_model=Order)
-async def create_order(order_create: OrderCreate, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
+async def create_order(order_create: OrderCreate, current_user: User = CURRENT_USER):
+    cart = await carts_collection.find_one({"user_id": current_user.id})
     if not cart or not cart.get("items"):
         raise HTTPException(status_code=400, detail="Cart is empty")
     
     cart = Cart(**cart)
     order_items = []
     total_amount = 0
+
+    product_ids = [cart_item.product_id for cart_item in cart.items]
+    products = await db.products.find(
+        {"id": {"$in": product_ids}},
+        {"_id": 0, "id": 1, "name": 1, "price": 1}
+    ).to_list(len(product_ids))
+    products_by_id = {product["id"]: product for product in products}
     
     for cart_item in cart.items:
-        product = await db.products.find_one({"id": cart_item.product_id})
+        product = products_by_id.get(cart_item.product_id)
         if not product:
             continue
         
@@ -350,58 +523,62 @@ async def create_order(order_create: OrderCreate, current_user: User = Depends(g
         order_items.append(order_item)
         total_amount += product["price"] * cart_item.quantity
     
+    now = datetime.now(timezone.utc)
     order = Order(
         user_id=current_user.id,
         items=order_items,
         total_amount=total_amount,
-        shipping_address=order_create.shipping_address
+        shipping_address=order_create.shipping_address,
+        created_at=now,
+        updated_at=now
     )
     
-    await db.orders.insert_one(order.dict())
+    await db.orders.insert_one(order.model_dump())
     
     # Clear cart
-    cart.items = []
-    cart.updated_at = datetime.utcnow()
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict())
+    await carts_collection.update_one(
+        {"user_id": current_user.id},
+        {"$set": {"items": [], "updated_at": now}}
+    )
     
     return order
 
-@api_router.get("/orders", response_model=List[Order])
-async def get_orders(current_user: User = Depends(get_current_user)):
+@api_router.get("/orders", response_class=ORJSONResponse)
+async def get_orders(current_user: User = CURRENT_USER):
     query = {"user_id": current_user.id} if not current_user.is_admin else {}
-    orders = await db.orders.find(query).sort("created_at", -1).to_list(100)
-    return [Order(**order) for order in orders]
+    cursor = db.orders.find(query, {"_id": 0}).sort("created_at", -1).limit(100)
+    return ORJSONResponse([order async for order in cursor])
 
-@api_router.get("/orders/{order_id}", response_model=Order)
-async def get_order(order_id: str, current_user: User = Depends(get_current_user)):
-    order = await db.orders.find_one({"id": order_id})
+@api_router.get("/orders/{order_id}", response_class=ORJSONResponse)
+async def get_order(order_id: str, current_user: User = CURRENT_USER):
+    order = await db.orders.find_one({"id": order_id}, {"_id": 0})
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    order = Order(**order)
-    if not current_user.is_admin and order.user_id != current_user.id:
+    if not current_user.is_admin and order["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return order
+    return ORJSONResponse(order)
 
 # Reviews endpoints
-@api_router.get("/products/{product_id}/reviews", response_model=List[Review])
+@api_router.get("/products/{product_id}/reviews", response_class=ORJSONResponse)
 async def get_product_reviews(product_id: str):
-    reviews = await db.reviews.find({"product_id": product_id}).sort("created_at", -1).to_list(100)
-    return [Review(**review) for review in reviews]
+    cursor = db.reviews.find({"product_id": product_id}, {"_id": 0}).sort("created_at", -1).limit(100)
+    return ORJSONResponse([review async for review in cursor])
 
 @api_router.post("/reviews", response_model=Review)
-async def create_review(review: ReviewCreate, current_user: User = Depends(get_current_user)):
-    # Check if product exists
-    product = await db.products.find_one({"id": review.product_id})
+async def create_review(review: ReviewCreate, current_user: User = CURRENT_USER):
+    # Check the product exists and the user hasn't reviewed it yet
+    product, existing_review = await asyncio.gather(
+        db.products.find_one({"id": review.product_id}, {"_id": 1}),
+        db.reviews.find_one({
+            "product_id": review.product_id,
+            "user_id": current_user.id
+        }, {"_id": 1}),
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Check if user already reviewed this product
-    existing_review = await db.reviews.find_one({
-        "product_id": review.product_id,
-        "user_id": current_user.id
-    })
     if existing_review:
         raise HTTPException(status_code=400, detail="You have already reviewed this product")
     
@@ -413,18 +590,85 @@ async def create_review(review: ReviewCreate, current_user: User = Depends(get_c
         comment=review.comment
     )
     
-    await db.reviews.insert_one(review_obj.dict())
+    try:
+        await db.reviews.insert_one(review_obj.model_dump())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="You have already reviewed this product")
     
     # Update product rating
-    reviews = await db.reviews.find({"product_id": review.product_id}).to_list(1000)
-    avg_rating = sum(r["rating"] for r in reviews) / len(reviews)
+    stats = await db.reviews.aggregate([
+        {"$match": {"product_id": review.product_id}},
+        {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}, "count": {"$sum": 1}}}
+    ]).to_list(1)
     await db.products.update_one(
         {"id": review.product_id},
-        {"$set": {"rating": round(avg_rating, 1), "review_count": len(reviews)}}
+        {"$set": {"rating": round(stats[0]["avg_rating"], 1), "review_count": stats[0]["count"]}}
     )
+    invalidate_catalog()
     
     return review_obj
 
+# Batch endpoint
+BATCH_MAX_REQUESTS = 20
+
+async def dispatch_subrequest(url: str, headers: List[tuple]) -> dict:
+    # Run a GET through the ASGI app in-process, as if it came in on its own
+    path, _, query = url.partition("?")
+    path = api_router.prefix + path
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": None,
+        "server": None,
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # The error middleware has already sent a 500 before re-raising
+        logger.exception("Batched request to %s failed", url)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    if dict(start.get("headers", [])).get(b"content-type", b"").startswith(b"application/json"):
+        body = orjson.loads(body)
+    else:
+        body = body.decode() or None
+    return {"status": start["status"], "body": body}
+
+@api_router.post("/batch", response_class=ORJSONResponse)
+async def batch(batch_request: BatchRequest, request: Request):
+    if len(batch_request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    for item in batch_request.requests:
+        if item.method.upper() != "GET" or not item.url.startswith("/"):
+            raise HTTPException(status_code=400, detail="Only GET requests to API paths can be batched")
+    
+    # Sub-requests run as the caller
+    headers = [(b"accept", b"application/json")]
+    authorization = request.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode()))
+    
+    responses = await asyncio.gather(
+        *(dispatch_subrequest(item.url, headers) for item in batch_request.requests)
+    )
+    return ORJSONResponse(responses)
+
 # Initialize sample data
 @api_router.post("/init-data")
 async def init_sample_data():
@@ -556,23 +800,27 @@ async def init_sample_data():
     ]
     
     # Add IDs to products
+    now = datetime.now(timezone.utc)
     for product in sample_products:
-        product["id"] = str(uuid.uuid4())
-        product["created_at"] = datetime.utcnow()
-    
-    await db.products.insert_many(sample_products)
+        product["id"] = generate_id()
+        product["created_at"] = now
     
     # Create admin user
     admin_user = {
-        "id": str(uuid.uuid4()),
+        "id": generate_id(),
         "email": "admin@techhaven.com",
         "full_name": "Admin User",
         "phone": "+1234567890",
         "is_admin": True,
-        "created_at": datetime.utcnow(),
-        "hashed_password": get_password_hash("admin123")
+        "created_at": now,
+        "hashed_password": await get_password_hash("admin123")
     }
-    await db.users.insert_one(admin_user)
+
+    await asyncio.gather(
+        db.products.insert_many(sample_products, ordered=False),
+        db.users.insert_one(admin_user),
+    )
+    invalidate_catalog()
     
     return {"message": "Sample data initialized successfully"}
 
@@ -585,6 +833,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "ETag"],
 )
 
 logging.basicConfig(
@@ -593,6 +842,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def ensure_indexes():
+    await db.users.create_index("email", unique=True)
+    await db.users.create_index("id", unique=True)
+    await db.products.create_index("id", unique=True)
+    await db.products.create_index([("category", 1), ("brand", 1), ("price", 1)])
+    await db.products.create_index([("featured", 1), ("created_at", -1)])
+    await db.products.create_index([("created_at", -1), ("id", 1)])
+    await db.products.create_index([("name", "text"), ("description", "text"), ("brand", "text")])
+    await carts_collection.create_index("user_id", unique=True)
+    await db.orders.create_index("id", unique=True)
+    await db.orders.create_index([("user_id", 1), ("created_at", -1)])
+    await db.orders.create_index([("created_at", -1)])
+    await db.reviews.create_index([("product_id", 1), ("created_at", -1)])
+    await db.reviews.create_index([("product_id", 1), ("user_id", 1)], unique=True)
+
+@app.on_event("startup")
+async def start_token_cache_sweeper():
+    app.state.token_cache_sweeper = asyncio.create_task(sweep_token_cache())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.token_cache_sweeper.cancel()
     client.close()
\ No newline at end of file
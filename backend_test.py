@@ -4,10 +4,21 @@ Tech Haven E-commerce Backend API Tests
 Tests all backend functionality according to test_result.md requirements
 """
 
-import requests
+import asyncio
+import contextvars
+import httpx
 import json
+import orjson
+import re
 import sys
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
+
+try:
+    import uvloop
+except ImportError:  # uvloop doesn't support Windows
+    uvloop = None
 
 # Configuration
 BASE_URL = "https://3a6dc992-ed94-4c9b-927a-1c2947dfb8e4.preview.emergentagent.com/api"
@@ -18,245 +29,342 @@ TEST_USER = {
     "phone": "+1234567890"
 }
 
+# Query params exercised by test_products_filters, by filter name
+PRODUCTS_URL = httpx.URL("/products")
+PRODUCT_FILTERS = {
+    "Category": {"category": "Gaming"},
+    "Brand": {"brand": "Apple"},
+    "Price": {"min_price": 1000, "max_price": 2000},
+    "Search": {"search": "MacBook"},
+    "Featured": {"featured": "true"},
+}
+
+# One bit per test outcome in TechHavenTester._result_bits
+RESULT_NAMES = (
+    "init_data",
+    "auth_register",
+    "auth_login",
+    "auth_me",
+    "products_list",
+    "products_filters",
+    "products_categories",
+    "products_detail",
+    "cart_add",
+    "cart_get",
+    "cart_update",
+    "cart_remove",
+    "orders_create",
+    "reviews_create",
+    "reviews_get",
+)
+RESULT_FLAGS = {name: 1 << i for i, name in enumerate(RESULT_NAMES)}
+RESULT_TITLES = tuple(name.replace("_", " ").title() for name in RESULT_NAMES)
+
+# Connection failures are retried by the transport; these statuses are retried
+# by make_request with exponential backoff, for idempotent methods only since
+# a gateway error can follow a write the upstream already applied
+RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.3
+RETRY_STATUSES = {502, 503, 504}
+RETRY_METHODS = {"GET", "PUT", "DELETE"}
+
+# Anonymous GET responses kept in memory for the rest of the run. Requests to
+# the mutating prefixes drop the cached product and category entries.
+MEMORY_CACHE_SIZE = 64
+MEMORY_CACHEABLE_PATH = re.compile(r"/categories|/products(/[^/]+(/reviews)?)?")
+CATALOG_MUTATING_PREFIXES = ("/init-data", "/cart", "/orders", "/reviews")
+
+# Lines logged by the test running in the current task, flushed when it finishes
+LOG_BUFFER: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("LOG_BUFFER", default=None)
+
+def parse_json(response: httpx.Response) -> Any:
+    """Decode a JSON body straight from the raw bytes with orjson"""
+    return orjson.loads(response.content)
+
+def body_preview(response: httpx.Response, limit: int = 200) -> str:
+    """Decode just the start of a body for failure logs"""
+    return response.content[:limit].decode(errors="replace")
+
+@dataclass(frozen=True)
+class Node:
+    """A test in the run graph; it starts as soon as every node in deps has passed"""
+    name: str
+    label: str
+    func: Callable[[], Awaitable[bool]]
+    deps: Tuple[str, ...] = ()
+
 class TechHavenTester:
     def __init__(self):
         self.base_url = BASE_URL
         self.auth_token = None
+        self.auth_headers = {}
         self.test_user_id = None
         self.product_ids = []
         self.cart_items = []
         self.order_id = None
-        self.results = {
-            "init_data": False,
-            "auth_register": False,
-            "auth_login": False,
-            "auth_me": False,
-            "products_list": False,
-            "products_filters": False,
-            "products_categories": False,
-            "products_detail": False,
-            "cart_add": False,
-            "cart_get": False,
-            "cart_update": False,
-            "cart_remove": False,
-            "orders_create": False,
-            "reviews_create": False,
-            "reviews_get": False
-        }
+        self.client: Optional[httpx.AsyncClient] = None
+        self._result_bits = 0
+        self._response_cache: OrderedDict[str, bytes] = OrderedDict()
+        self.prefetched: Dict[str, asyncio.Task] = {}
+        self.catalog_seeded = False
+        self.registration_done = asyncio.Event()
+        
+    @property
+    def results(self) -> Dict[str, bool]:
+        """Test outcomes by name, unpacked from the result bitmask"""
+        return {name: bool(self._result_bits & flag) for name, flag in RESULT_FLAGS.items()}
+        
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=RETRIES,
+                # One pool of keep-alive connections shared by every request;
+                # over HTTP/2 concurrent requests share a single connection
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16)
+            )
+        )
+        await self.warm_up()
+        return self
+        
+    async def warm_up(self):
+        """Open the connection before the first test so it doesn't pay for the handshake"""
+        try:
+            response = await self.client.head("/")
+        except httpx.HTTPError as e:
+            self.log(f"Connection warm-up failed: {e}", False)
+            return
+        if response.http_version != "HTTP/2":
+            print(f"⚠️ Server negotiated {response.http_version}; requests won't be multiplexed")
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
         
     def log(self, message: str, success: bool = True):
         """Log test results"""
         status = "✅" if success else "❌"
-        print(f"{status} {message}")
+        buffer = LOG_BUFFER.get()
+        if buffer is None:
+            print(f"{status} {message}")
+        else:
+            buffer.append(f"{status} {message}")
         
-    def make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                    auth: bool = False) -> requests.Response:
-        """Make HTTP request with optional authentication"""
-        url = f"{self.base_url}{endpoint}"
-        headers = {"Content-Type": "application/json"}
+    async def make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
+                    auth: bool = False, fresh: bool = False) -> httpx.Response:
+        """Make HTTP request with optional authentication, skipping cached responses if fresh"""
+        method = method.upper()
+        # httpx sets Content-Type itself when there is a JSON body
+        headers = self.auth_headers if auth else None
         
-        if auth and self.auth_token:
-            headers["Authorization"] = f"Bearer {self.auth_token}"
-            
-        try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            elif method.upper() == "PUT":
-                response = requests.put(url, headers=headers, json=data, timeout=30)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=headers, timeout=30)
+        path = endpoint.partition("?")[0]
+        memory_key = None
+        if method == "GET" and not auth and MEMORY_CACHEABLE_PATH.fullmatch(path):
+            memory_key = endpoint
+            content = None if fresh else self._response_cache.get(memory_key)
+            if content is not None:
+                self._response_cache.move_to_end(memory_key)
+                return httpx.Response(
+                    200,
+                    content=content,
+                    headers={"Content-Type": "application/json"},
+                    request=self.client.build_request(method, endpoint)
+                )
+        elif method != "GET" and path.startswith(CATALOG_MUTATING_PREFIXES):
+            self.invalidate_catalog()
+        
+        attempts = RETRIES + 1 if method in RETRY_METHODS else 1
+        for attempt in range(attempts):
+            try:
+                response = await self.client.request(method, endpoint, json=data, headers=headers)
+            except httpx.HTTPError as e:
+                self.log(f"Request failed: {e}", False)
+                raise
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                break
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        
+        if response.status_code == 200 and memory_key is not None:
+            self.remember_response(memory_key, response.content)
+        return response
+    
+    def prefetch(self, endpoint: str):
+        """Start a GET in the background so the test that needs it finds it already answered"""
+        self.prefetched[endpoint] = asyncio.create_task(self.make_request("GET", endpoint))
+    
+    async def get_prefetched(self, endpoint: str) -> httpx.Response:
+        """Take a prefetched GET, refetching it if init-data seeded the catalog after it was sent"""
+        task = self.prefetched.pop(endpoint, None)
+        if task is not None:
+            try:
+                response = await task
+            except httpx.HTTPError:
+                pass
             else:
-                raise ValueError(f"Unsupported method: {method}")
-                
-            return response
-        except requests.exceptions.RequestException as e:
-            self.log(f"Request failed: {e}", False)
-            raise
+                if not self.catalog_seeded:
+                    return response
+        return await self.make_request("GET", endpoint, fresh=self.catalog_seeded)
+    
+    def remember_response(self, key: str, content: bytes):
+        """Store a response body in the in-memory LRU, evicting the oldest entry when full"""
+        self._response_cache[key] = content
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > MEMORY_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def invalidate_catalog(self):
+        """Drop cached product and category responses after a request that may have changed them"""
+        for key in [key for key in self._response_cache if key.startswith(("/products", "/categories"))]:
+            del self._response_cache[key]
     
-    def test_init_data(self) -> bool:
+    async def test_init_data(self) -> bool:
         """Test sample data initialization"""
         self.log("Testing sample data initialization...")
         
-        try:
-            response = self.make_request("POST", "/init-data")
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                if "message" in data:
-                    self.log("Sample data initialization successful")
-                    self.results["init_data"] = True
-                    return True
-            
-            self.log(f"Init data failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Init data error: {e}", False)
-            return False
+        response = await self.make_request("POST", "/init-data")
+        
+        if response.status_code in [200, 201]:
+            data = parse_json(response)
+            if "message" in data:
+                # Anything fetched before this point saw an empty catalog
+                self.catalog_seeded = data["message"] != "Sample data already exists"
+                self.log("Sample data initialization successful")
+                self._result_bits |= RESULT_FLAGS["init_data"]
+                return True
+        
+        self.log(f"Init data failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_auth_register(self) -> bool:
+    async def test_auth_register(self) -> bool:
         """Test user registration"""
         self.log("Testing user registration...")
         
         try:
-            response = self.make_request("POST", "/register", TEST_USER)
+            response = await self.make_request("POST", "/register", TEST_USER)
             
             if response.status_code in [200, 201]:
-                data = response.json()
+                data = parse_json(response)
                 if "message" in data:
                     self.log("User registration successful")
-                    self.results["auth_register"] = True
+                    self._result_bits |= RESULT_FLAGS["auth_register"]
                     return True
-            elif response.status_code == 400 and "already registered" in response.text:
+            elif response.status_code == 400 and b"already registered" in response.content:
                 self.log("User already exists (expected for repeated tests)")
-                self.results["auth_register"] = True
+                self._result_bits |= RESULT_FLAGS["auth_register"]
                 return True
                 
-            self.log(f"Registration failed: {response.status_code} - {response.text}", False)
+            self.log(f"Registration failed: {response.status_code} - {body_preview(response)}", False)
             return False
             
-        except Exception as e:
-            self.log(f"Registration error: {e}", False)
-            return False
+        finally:
+            self.registration_done.set()
     
-    def test_auth_login(self) -> bool:
+    async def test_auth_login(self) -> bool:
         """Test user login"""
         self.log("Testing user login...")
         
-        try:
-            login_data = {
-                "email": TEST_USER["email"],
-                "password": TEST_USER["password"]
-            }
-            response = self.make_request("POST", "/login", login_data)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "access_token" in data and "token_type" in data:
-                    self.auth_token = data["access_token"]
-                    self.log("User login successful")
-                    self.results["auth_login"] = True
-                    return True
-                    
-            self.log(f"Login failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Login error: {e}", False)
-            return False
+        login_data = {
+            "email": TEST_USER["email"],
+            "password": TEST_USER["password"]
+        }
+        response = await self.make_request("POST", "/login", login_data)
+        if response.status_code == 401:
+            # Login ran ahead of a first-time registration; retry once it lands
+            await self.registration_done.wait()
+            if self._result_bits & RESULT_FLAGS["auth_register"]:
+                response = await self.make_request("POST", "/login", login_data)
+        
+        if response.status_code == 200:
+            data = parse_json(response)
+            if "access_token" in data and "token_type" in data:
+                self.auth_token = data["access_token"]
+                self.auth_headers = {"Authorization": f"Bearer {self.auth_token}"}
+                self.log("User login successful")
+                self._result_bits |= RESULT_FLAGS["auth_login"]
+                return True
+                
+        self.log(f"Login failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_auth_me(self) -> bool:
+    async def test_auth_me(self) -> bool:
         """Test get current user profile"""
         self.log("Testing get user profile...")
         
-        try:
-            response = self.make_request("GET", "/me", auth=True)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "id" in data and "email" in data and "full_name" in data:
-                    self.test_user_id = data["id"]
-                    self.log("Get user profile successful")
-                    self.results["auth_me"] = True
-                    return True
-                    
-            self.log(f"Get profile failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Get profile error: {e}", False)
-            return False
+        for attempt in range(3):
+            response = await self.make_request("GET", "/me", auth=True)
+            if response.status_code != 401:
+                break
+            await asyncio.sleep(0.1 * 2 ** attempt)
+        
+        if response.status_code == 200:
+            data = parse_json(response)
+            if "id" in data and "email" in data and "full_name" in data:
+                self.test_user_id = data["id"]
+                self.log("Get user profile successful")
+                self._result_bits |= RESULT_FLAGS["auth_me"]
+                return True
+                
+        self.log(f"Get profile failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_products_list(self) -> bool:
+    async def test_products_list(self) -> bool:
         """Test get all products"""
         self.log("Testing get all products...")
         
-        try:
-            response = self.make_request("GET", "/products")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list) and len(data) > 0:
-                    # Store product IDs for later tests
-                    self.product_ids = [product["id"] for product in data[:3]]
-                    self.log(f"Get products successful - found {len(data)} products")
-                    self.results["products_list"] = True
-                    return True
-                    
-            self.log(f"Get products failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Get products error: {e}", False)
-            return False
+        response = await self.get_prefetched("/products")
+        
+        if response.status_code == 200:
+            data = parse_json(response)
+            if isinstance(data, list) and len(data) > 0:
+                # Store product IDs for later tests
+                self.product_ids = [product["id"] for product in data[:3]]
+                self.log(f"Get products successful - found {len(data)} products")
+                self._result_bits |= RESULT_FLAGS["products_list"]
+                return True
+                
+        self.log(f"Get products failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_products_filters(self) -> bool:
+    async def test_products_filters(self) -> bool:
         """Test product filtering"""
         self.log("Testing product filters...")
         
-        try:
-            # Test category filter
-            response = self.make_request("GET", "/products?category=Gaming")
-            if response.status_code != 200:
-                self.log(f"Category filter failed: {response.status_code}", False)
-                return False
-                
-            # Test brand filter
-            response = self.make_request("GET", "/products?brand=Apple")
-            if response.status_code != 200:
-                self.log(f"Brand filter failed: {response.status_code}", False)
-                return False
-                
-            # Test price filter
-            response = self.make_request("GET", "/products?min_price=1000&max_price=2000")
-            if response.status_code != 200:
-                self.log(f"Price filter failed: {response.status_code}", False)
-                return False
-                
-            # Test search
-            response = self.make_request("GET", "/products?search=MacBook")
-            if response.status_code != 200:
-                self.log(f"Search filter failed: {response.status_code}", False)
+        payload = {"requests": [
+            {"method": "GET", "url": str(PRODUCTS_URL.copy_with(params=params))}
+            for params in PRODUCT_FILTERS.values()
+        ]}
+        response = await self.make_request("POST", "/batch", payload)
+        if response.status_code != 200:
+            self.log(f"Batch request failed: {response.status_code} - {body_preview(response)}", False)
+            return False
+        
+        for name, result in zip(PRODUCT_FILTERS, parse_json(response)):
+            if result["status"] != 200:
+                self.log(f"{name} filter failed: {result['status']}", False)
                 return False
                 
-            # Test featured filter
-            response = self.make_request("GET", "/products?featured=true")
-            if response.status_code == 200:
-                self.log("Product filters successful")
-                self.results["products_filters"] = True
-                return True
-                
-            self.log(f"Featured filter failed: {response.status_code}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Product filters error: {e}", False)
-            return False
+        self.log("Product filters successful")
+        self._result_bits |= RESULT_FLAGS["products_filters"]
+        return True
     
-    def test_products_categories(self) -> bool:
+    async def test_products_categories(self) -> bool:
         """Test get categories and brands"""
         self.log("Testing get categories and brands...")
         
-        try:
-            response = self.make_request("GET", "/categories")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "categories" in data and "brands" in data:
-                    self.log("Get categories successful")
-                    self.results["products_categories"] = True
-                    return True
-                    
-            self.log(f"Get categories failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Get categories error: {e}", False)
-            return False
+        response = await self.get_prefetched("/categories")
+        
+        if response.status_code == 200:
+            data = parse_json(response)
+            if "categories" in data and "brands" in data:
+                self.log("Get categories successful")
+                self._result_bits |= RESULT_FLAGS["products_categories"]
+                return True
+                
+        self.log(f"Get categories failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_products_detail(self) -> bool:
+    async def test_products_detail(self) -> bool:
         """Test get product detail"""
         self.log("Testing get product detail...")
         
@@ -264,178 +372,138 @@ class TechHavenTester:
             self.log("No product IDs available for detail test", False)
             return False
             
-        try:
-            product_id = self.product_ids[0]
-            response = self.make_request("GET", f"/products/{product_id}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "id" in data and "name" in data and "price" in data:
-                    self.log("Get product detail successful")
-                    self.results["products_detail"] = True
-                    return True
-                    
-            self.log(f"Get product detail failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Get product detail error: {e}", False)
+        # Goes straight to the client so neither response cache can answer for the server
+        product_id = self.product_ids[0]
+        response = await self.client.get(f"/products/{product_id}")
+        if response.status_code != 200:
+            self.log(f"Get product detail failed: {response.status_code} - {body_preview(response)}", False)
             return False
-    
-    def test_cart_add(self) -> bool:
-        """Test add item to cart"""
-        self.log("Testing add item to cart...")
         
-        if not self.product_ids:
-            self.log("No product IDs available for cart test", False)
-            return False
-            
-        try:
-            cart_item = {
-                "product_id": self.product_ids[0],
-                "quantity": 2
-            }
-            response = self.make_request("POST", "/cart/add", cart_item, auth=True)
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                if "message" in data:
-                    self.cart_items.append(cart_item)
-                    self.log("Add to cart successful")
-                    self.results["cart_add"] = True
-                    return True
-                    
-            self.log(f"Add to cart failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Add to cart error: {e}", False)
+        # Listing cards leave these out, so they prove the detail endpoint answered
+        data = parse_json(response)
+        if not all(field in data for field in ("id", "name", "price", "description", "specifications")):
+            self.log(f"Get product detail returned an unexpected body: {body_preview(response)}", False)
             return False
-    
-    def test_cart_get(self) -> bool:
-        """Test get cart"""
-        self.log("Testing get cart...")
         
-        try:
-            response = self.make_request("GET", "/cart", auth=True)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "id" in data and "user_id" in data and "items" in data:
-                    self.log("Get cart successful")
-                    self.results["cart_get"] = True
-                    return True
-                    
-            self.log(f"Get cart failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Get cart error: {e}", False)
-            return False
+        self.log("Get product detail successful")
+        self._result_bits |= RESULT_FLAGS["products_detail"]
+        return True
+    
+    async def run_cart_ops(self, ops) -> bool:
+        """Apply one product's cart operations in order, stopping at the first failure"""
+        for op, product_id, quantity in ops:
+            if op == "add":
+                response = await self.make_request("POST", "/cart/add", {"product_id": product_id, "quantity": quantity}, auth=True)
+            elif op == "update":
+                response = await self.make_request("PUT", "/cart/update", {"product_id": product_id, "quantity": quantity}, auth=True)
+            else:
+                response = await self.make_request("DELETE", f"/cart/remove/{product_id}", auth=True)
+                
+            if response.status_code not in [200, 201] or "message" not in parse_json(response):
+                self.log(f"Cart {op} failed: {response.status_code} - {body_preview(response)}", False)
+                return False
+        return True
     
-    def test_cart_update(self) -> bool:
-        """Test update cart item"""
-        self.log("Testing update cart item...")
+    async def test_cart_pipeline(self) -> bool:
+        """Test cart add, get, update and remove with one final read"""
+        self.log("Testing cart add, update and remove...")
         
         if not self.product_ids:
-            self.log("No product IDs available for cart update test", False)
+            self.log("No product IDs available for cart tests", False)
             return False
             
-        try:
-            cart_item = {
-                "product_id": self.product_ids[0],
-                "quantity": 3
-            }
-            response = self.make_request("PUT", "/cart/update", cart_item, auth=True)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "message" in data:
-                    self.log("Update cart successful")
-                    self.results["cart_update"] = True
-                    return True
-                    
-            self.log(f"Update cart failed: {response.status_code} - {response.text}", False)
+        first_id = self.product_ids[0]
+        second_id = self.product_ids[1] if len(self.product_ids) > 1 else self.product_ids[0]
+        ops = [
+            ("add", first_id, 2),
+            ("update", first_id, 3),
+            ("add", second_id, 1),
+            ("remove", second_id, None),
+        ]
+        
+        # Operations on different products commute, so each product's
+        # operations run as their own ordered chain, concurrently
+        chains: Dict[str, list] = {}
+        expected: Dict[str, Optional[int]] = {}
+        for op, product_id, quantity in ops:
+            chains.setdefault(product_id, []).append((op, product_id, quantity))
+            if op == "add":
+                expected[product_id] = (expected.get(product_id) or 0) + quantity
+            elif op == "update":
+                expected[product_id] = quantity if quantity > 0 else None
+            else:
+                expected[product_id] = None
+                
+        chain_ok = dict(zip(chains, await asyncio.gather(
+            *(self.run_cart_ops(chain) for chain in chains.values())
+        )))
+        
+        response = await self.make_request("GET", "/cart", auth=True)
+        if response.status_code != 200:
+            self.log(f"Get cart failed: {response.status_code} - {body_preview(response)}", False)
             return False
-            
-        except Exception as e:
-            self.log(f"Update cart error: {e}", False)
+        data = parse_json(response)
+        if not ("id" in data and "user_id" in data and "items" in data):
+            self.log(f"Get cart returned an unexpected body: {body_preview(response)}", False)
             return False
+        self.log("Get cart successful")
+        self._result_bits |= RESULT_FLAGS["cart_get"]
+        
+        actual = {item["product_id"]: item["quantity"] for item in data["items"]}
+        state_ok = {product_id: actual.get(product_id) == quantity for product_id, quantity in expected.items()}
+        
+        if chain_ok[first_id]:
+            self.cart_items.append({"product_id": first_id, "quantity": 2})
+            self.log("Add to cart successful")
+            self._result_bits |= RESULT_FLAGS["cart_add"]
+        if chain_ok[first_id] and state_ok[first_id]:
+            self.log("Update cart successful")
+            self._result_bits |= RESULT_FLAGS["cart_update"]
+        if chain_ok[second_id] and state_ok[second_id]:
+            self.log("Remove from cart successful")
+            self._result_bits |= RESULT_FLAGS["cart_remove"]
+            
+        if all(chain_ok.values()) and all(state_ok.values()):
+            return True
+        
+        self.log(f"Cart state mismatch: expected {expected}, got {actual}", False)
+        return False
     
-    def test_cart_remove(self) -> bool:
-        """Test remove item from cart"""
-        self.log("Testing remove item from cart...")
+    async def test_orders_create(self) -> bool:
+        """Test create order"""
+        self.log("Testing create order...")
         
-        if not self.product_ids:
-            self.log("No product IDs available for cart remove test", False)
-            return False
-            
-        try:
-            # Add another item first
+        # Ensure we have items in cart
+        if self.product_ids:
             cart_item = {
-                "product_id": self.product_ids[1] if len(self.product_ids) > 1 else self.product_ids[0],
+                "product_id": self.product_ids[0],
                 "quantity": 1
             }
-            self.make_request("POST", "/cart/add", cart_item, auth=True)
-            
-            # Now remove it
-            product_id = cart_item["product_id"]
-            response = self.make_request("DELETE", f"/cart/remove/{product_id}", auth=True)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "message" in data:
-                    self.log("Remove from cart successful")
-                    self.results["cart_remove"] = True
-                    return True
-                    
-            self.log(f"Remove from cart failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Remove from cart error: {e}", False)
-            return False
-    
-    def test_orders_create(self) -> bool:
-        """Test create order"""
-        self.log("Testing create order...")
+            await self.make_request("POST", "/cart/add", cart_item, auth=True)
         
-        try:
-            # Ensure we have items in cart
-            if self.product_ids:
-                cart_item = {
-                    "product_id": self.product_ids[0],
-                    "quantity": 1
-                }
-                self.make_request("POST", "/cart/add", cart_item, auth=True)
-            
-            order_data = {
-                "shipping_address": {
-                    "street": "123 Tech Street",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip_code": "94105",
-                    "country": "USA"
-                }
+        order_data = {
+            "shipping_address": {
+                "street": "123 Tech Street",
+                "city": "San Francisco",
+                "state": "CA",
+                "zip_code": "94105",
+                "country": "USA"
             }
-            response = self.make_request("POST", "/orders", order_data, auth=True)
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                if "id" in data and "total_amount" in data and "items" in data:
-                    self.order_id = data["id"]
-                    self.log("Create order successful")
-                    self.results["orders_create"] = True
-                    return True
-                    
-            self.log(f"Create order failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Create order error: {e}", False)
-            return False
+        }
+        response = await self.make_request("POST", "/orders", order_data, auth=True)
+        
+        if response.status_code in [200, 201]:
+            data = parse_json(response)
+            if "id" in data and "total_amount" in data and "items" in data:
+                self.order_id = data["id"]
+                self.log("Create order successful")
+                self._result_bits |= RESULT_FLAGS["orders_create"]
+                return True
+                
+        self.log(f"Create order failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_reviews_create(self) -> bool:
+    async def test_reviews_create(self) -> bool:
         """Test create review"""
         self.log("Testing create review...")
         
@@ -443,33 +511,28 @@ class TechHavenTester:
             self.log("No product IDs available for review test", False)
             return False
             
-        try:
-            review_data = {
-                "product_id": self.product_ids[0],
-                "rating": 5,
-                "comment": "Excellent laptop! Great performance and build quality. Highly recommended for professional use."
-            }
-            response = self.make_request("POST", "/reviews", review_data, auth=True)
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                if "id" in data and "rating" in data and "comment" in data:
-                    self.log("Create review successful")
-                    self.results["reviews_create"] = True
-                    return True
-            elif response.status_code == 400 and "already reviewed" in response.text:
-                self.log("User already reviewed this product (expected for repeated tests)")
-                self.results["reviews_create"] = True
+        review_data = {
+            "product_id": self.product_ids[0],
+            "rating": 5,
+            "comment": "Excellent laptop! Great performance and build quality. Highly recommended for professional use."
+        }
+        response = await self.make_request("POST", "/reviews", review_data, auth=True)
+        
+        if response.status_code in [200, 201]:
+            data = parse_json(response)
+            if "id" in data and "rating" in data and "comment" in data:
+                self.log("Create review successful")
+                self._result_bits |= RESULT_FLAGS["reviews_create"]
                 return True
-                    
-            self.log(f"Create review failed: {response.status_code} - {response.text}", False)
-            return False
-            
-        except Exception as e:
-            self.log(f"Create review error: {e}", False)
-            return False
+        elif response.status_code == 400 and b"already reviewed" in response.content:
+            self.log("User already reviewed this product (expected for repeated tests)")
+            self._result_bits |= RESULT_FLAGS["reviews_create"]
+            return True
+                
+        self.log(f"Create review failed: {response.status_code} - {body_preview(response)}", False)
+        return False
     
-    def test_reviews_get(self) -> bool:
+    async def test_reviews_get(self) -> bool:
         """Test get product reviews"""
         self.log("Testing get product reviews...")
         
@@ -477,81 +540,126 @@ class TechHavenTester:
             self.log("No product IDs available for reviews get test", False)
             return False
             
+        product_id = self.product_ids[0]
+        response = await self.make_request("GET", f"/products/{product_id}/reviews")
+        
+        if response.status_code == 200:
+            data = parse_json(response)
+            if isinstance(data, list):
+                self.log(f"Get reviews successful - found {len(data)} reviews")
+                self._result_bits |= RESULT_FLAGS["reviews_get"]
+                return True
+                
+        self.log(f"Get reviews failed: {response.status_code} - {body_preview(response)}", False)
+        return False
+    
+    async def run_test(self, test_name: str, test_func) -> bool:
+        """Run a single test, counting a crash as a failure"""
+        # Each test runs in its own task, so concurrent tests get separate buffers
+        buffer = [f"\n📋 {test_name}"]
+        LOG_BUFFER.set(buffer)
         try:
-            product_id = self.product_ids[0]
-            response = self.make_request("GET", f"/products/{product_id}/reviews")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list):
-                    self.log(f"Get reviews successful - found {len(data)} reviews")
-                    self.results["reviews_get"] = True
-                    return True
-                    
-            self.log(f"Get reviews failed: {response.status_code} - {response.text}", False)
-            return False
-            
+            return await test_func()
         except Exception as e:
-            self.log(f"Get reviews error: {e}", False)
+            self.log(f"Test {test_name} crashed: {e}", False)
             return False
+        finally:
+            sys.stdout.write("\n".join(buffer) + "\n")
+    
+    async def run_graph(self, nodes: list) -> Dict[str, bool]:
+        """Run each node once all its deps finish, skipping it if any of them failed"""
+        by_name = {node.name: node for node in nodes}
+        dependents: Dict[str, list] = {node.name: [] for node in nodes}
+        for node in nodes:
+            for dep in node.deps:
+                dependents[dep].append(node)
+        waiting = {node.name: len(node.deps) for node in nodes}
+        outcomes: Dict[str, bool] = {}
+        
+        async def run_node(node: Node):
+            failed_deps = [dep for dep in node.deps if not outcomes[dep]]
+            if failed_deps:
+                async def skip() -> bool:
+                    self.log(f"Skipped: {', '.join(by_name[dep].label for dep in failed_deps)} failed", False)
+                    return False
+                outcomes[node.name] = await self.run_test(node.label, skip)
+            else:
+                outcomes[node.name] = await self.run_test(node.label, node.func)
+            for child in dependents[node.name]:
+                waiting[child.name] -= 1
+                if not waiting[child.name]:
+                    tg.create_task(run_node(child))
+        
+        # run_test never raises, so one failing branch can't cancel the others
+        async with asyncio.TaskGroup() as tg:
+            for node in nodes:
+                if not node.deps:
+                    tg.create_task(run_node(node))
+        return outcomes
     
-    def run_all_tests(self):
-        """Run all backend tests in sequence"""
+    async def run_all_tests(self):
+        """Run all backend tests, overlapping the ones that don't depend on each other"""
         print("🚀 Starting Tech Haven Backend API Tests")
         print(f"📍 Base URL: {self.base_url}")
         print("=" * 60)
         
-        # Test sequence as per requirements
-        tests = [
-            ("Sample Data Initialization", self.test_init_data),
-            ("User Registration", self.test_auth_register),
-            ("User Login", self.test_auth_login),
-            ("Get User Profile", self.test_auth_me),
-            ("Get All Products", self.test_products_list),
-            ("Product Filters", self.test_products_filters),
-            ("Get Categories", self.test_products_categories),
-            ("Get Product Detail", self.test_products_detail),
-            ("Add to Cart", self.test_cart_add),
-            ("Get Cart", self.test_cart_get),
-            ("Update Cart", self.test_cart_update),
-            ("Remove from Cart", self.test_cart_remove),
-            ("Create Order", self.test_orders_create),
-            ("Create Review", self.test_reviews_create),
-            ("Get Reviews", self.test_reviews_get),
-        ]
+        # The public catalog reads don't need auth, so they go out now and
+        # their responses are usually waiting by the time their tests start
+        self.prefetch("/products")
+        self.prefetch("/categories")
         
-        passed = 0
-        failed = 0
+        # Test sequence as per requirements, expressed as dependencies so
+        # independent branches (cart/orders vs reviews) overlap. Registration
+        # is a no-op on repeat runs, so login doesn't depend on it and only
+        # waits for it if rejected.
+        await self.run_graph([
+            Node("init_data", "Sample Data Initialization", self.test_init_data),
+            Node("auth_register", "User Registration", self.test_auth_register),
+            Node("auth_login", "User Login", self.test_auth_login),
+            Node("auth_me", "Get User Profile", self.test_auth_me, ("auth_login",)),
+            Node("products_list", "Get All Products", self.test_products_list, ("init_data",)),
+            Node("products_filters", "Product Filters", self.test_products_filters, ("init_data",)),
+            Node("products_categories", "Get Categories", self.test_products_categories, ("init_data",)),
+            Node("products_detail", "Get Product Detail", self.test_products_detail, ("products_list",)),
+            Node("cart", "Cart Add, Get, Update and Remove", self.test_cart_pipeline,
+                 ("auth_login", "products_list")),
+            Node("orders_create", "Create Order", self.test_orders_create, ("cart",)),
+            Node("reviews_create", "Create Review", self.test_reviews_create,
+                 ("auth_login", "products_list")),
+            Node("reviews_get", "Get Reviews", self.test_reviews_get, ("reviews_create",)),
+        ])
         
-        for test_name, test_func in tests:
-            print(f"\n📋 {test_name}")
-            try:
-                if test_func():
-                    passed += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                self.log(f"Test {test_name} crashed: {e}", False)
-                failed += 1
-        
-        print("\n" + "=" * 60)
-        print("📊 TEST SUMMARY")
-        print("=" * 60)
+        # Drop prefetches whose tests were skipped
+        for task in self.prefetched.values():
+            if not task.cancel():
+                task.exception()
         
-        for key, value in self.results.items():
-            status = "✅ PASS" if value else "❌ FAIL"
-            print(f"{key.replace('_', ' ').title()}: {status}")
+        passed = self._result_bits.bit_count()
+        failed = len(RESULT_NAMES) - passed
         
-        print(f"\n🎯 Total: {passed + failed} tests")
-        print(f"✅ Passed: {passed}")
-        print(f"❌ Failed: {failed}")
-        print(f"📈 Success Rate: {(passed/(passed+failed)*100):.1f}%")
+        bar = "=" * 60
+        lines = ["", bar, "📊 TEST SUMMARY", bar, ""]
+        lines += [
+            f"{title}: {'✅ PASS' if (self._result_bits >> i) & 1 else '❌ FAIL'}"
+            for i, title in enumerate(RESULT_TITLES)
+        ]
+        lines += [
+            f"\n🎯 Total: {passed + failed} tests",
+            f"✅ Passed: {passed}",
+            f"❌ Failed: {failed}",
+            f"📈 Success Rate: {passed / max(1, passed + failed) * 100:.1f}%",
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
         
         return passed, failed, self.results
 
+async def main():
+    async with TechHavenTester() as tester:
+        return await tester.run_all_tests()
+
 if __name__ == "__main__":
-    tester = TechHavenTester()
-    passed, failed, results = tester.run_all_tests()
+    run = uvloop.run if uvloop is not None else asyncio.run
+    passed, failed, results = run(main())
     
     # Exit with error code if any tests failed
     sys.exit(0 if failed == 0 else 1)
\ No newline at end of file